@@ -1,13 +1,8 @@
 import streamlit as st
 import tempfile
 
-from services.text_service import text_input_to_text
-from services.image_service import image_to_text
-from services.audio_service import audio_to_text
-from services.video_service import video_to_text
-from services.mcq_service import generate_mcq
-from services.document_service import document_to_text
-from services.url_service import scrape_url_to_text
+from services.registry import SERVICES, get_service
+from services.mcq_service import generate_mcq, generate_mcq_stream
 
 # =======================
 # Streamlit Config
@@ -45,43 +40,60 @@ def go_to(page):
 def collect_input_text():
     input_type = st.selectbox(
         "Select Input Type",
-        ["Text", "Image", "Audio", "Video", "Document", "URL"]
+        list(SERVICES)
     )
 
     extracted_text = ""
 
     if input_type == "Text":
-        extracted_text = text_input_to_text(
+        extracted_text = get_service("Text")(
             st.text_area("Enter text", height=200)
         )
 
     elif input_type == "URL":
         url = st.text_input("Enter URL")
         if url:
-            extracted_text = scrape_url_to_text(url)
+            extracted_text = get_service("URL")(url)
 
-    else:
-        uploaded_file = st.file_uploader(
-            f"Upload {input_type}",
-            type=["pdf", "docx"] if input_type == "Document" else None
+    elif input_type == "Document":
+        uploaded_files = st.file_uploader(
+            "Upload Document(s)",
+            type=["pdf", "docx"],
+            accept_multiple_files=True
         )
 
+        if uploaded_files:
+            files = []
+            for uploaded_file in uploaded_files:
+                with tempfile.NamedTemporaryFile(delete=False) as tmp:
+                    tmp.write(uploaded_file.read())
+                    files.append((tmp.name, uploaded_file.name))
+
+            # Streamed lazily: pages are extracted while MCQs are generated,
+            # questions are spread over all documents by length
+            extracted_text = get_service("Document")(files)
+
+    else:
+        uploaded_file = st.file_uploader(f"Upload {input_type}")
+
         if uploaded_file:
             with tempfile.NamedTemporaryFile(delete=False) as tmp:
                 tmp.write(uploaded_file.read())
                 file_path = tmp.name
 
-            if input_type == "Image":
-                extracted_text = image_to_text(file_path)
-            elif input_type == "Audio":
-                extracted_text = audio_to_text(file_path)
-            elif input_type == "Video":
-                extracted_text = video_to_text(file_path)
-            elif input_type == "Document":
-                extracted_text = document_to_text(file_path, uploaded_file.name)
+            # Backend is imported on first use of this input type
+            extracted_text = get_service(input_type)(file_path)
 
     return extracted_text
 
+def has_input(source):
+    return not isinstance(source, str) or bool(source.strip())
+
+def build_mcqs(source, num_q):
+    if isinstance(source, str):
+        return generate_mcq(source, num_q)
+    return generate_mcq_stream(source, num_q)
+
 def resolve_correct_answers(q):
     correct_raw = q.get("correct", [])
     options = q.get("options", {})
@@ -136,9 +148,13 @@ def render_create():
 
     text = collect_input_text()
 
-    if st.button("Generate MCQs") and text.strip():
+    if st.button("Generate MCQs") and has_input(text):
         with st.spinner("Generating MCQs..."):
-            mcqs = generate_mcq(text, num_q)
+            mcqs = build_mcqs(text, num_q)
+
+        # Documents are only read now, so an empty upload shows up here
+        if not mcqs:
+            st.warning("No text could be extracted from the input.")
 
         for q_id, q in mcqs.items():
             st.markdown(f"### Q{q_id}. {q['mcq']}")
@@ -166,9 +182,14 @@ def render_attempt():
     if not st.session_state.quiz_generated:
         text = collect_input_text()
 
-        if st.button("Generate Quiz") and text.strip():
+        if st.button("Generate Quiz") and has_input(text):
             with st.spinner("Preparing Quiz..."):
-                st.session_state.mcqs = generate_mcq(text, num_q)
+                mcqs = build_mcqs(text, num_q)
+
+            if not mcqs:
+                st.warning("No text could be extracted from the input.")
+            else:
+                st.session_state.mcqs = mcqs
                 st.session_state.quiz_generated = True
                 st.session_state.quiz_submitted = False
                 st.session_state.user_answers = {}
@@ -0,0 +1,122 @@
+"""
+Batched vs. unbatched MCQ generation against a local stand-in model.
+
+Run from src/mcq_generator:
+    python -m benchmarks.batching
+"""
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from services import mcq_service
+
+# ==============================
+# Config
+# ==============================
+ROUND_TRIP = 0.4                    # seconds of network + queueing per call
+SECONDS_PER_TOKEN = 0.00002         # prompt processing
+SECONDS_PER_QUESTION = 0.05         # decoding
+SERVER_SLOTS = 2                    # requests the model serves in parallel
+CONCURRENT_USERS = 8
+
+
+# ==============================
+# Stand-in Model
+# ==============================
+def fake_questions(prefix: str, n: int) -> dict:
+    return {
+        str(i): {
+            "mcq": f"{prefix} question {i}?",
+            "options": {"a": "one", "b": "two", "c": "three", "d": "four"},
+            "correct": ["a"],
+            "explanation": "stand-in",
+        }
+        for i in range(1, n + 1)
+    }
+
+
+class StandInClient:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(SERVER_SLOTS)
+
+    def chat_completion(self, messages, temperature, max_tokens):
+        prompt = messages[0]["content"]
+
+        with self.lock:
+            self.calls += 1
+            call_id = self.calls
+
+        sections = re.findall(r'<section id="(\d+)" questions="(\d+)">', prompt)
+        if sections:
+            payload = {
+                sid: fake_questions(f"call {call_id} section {sid}", int(n))
+                for sid, n in sections
+            }
+            total = sum(int(n) for _, n in sections)
+        else:
+            total = int(re.search(r"Create exactly (\d+)", prompt).group(1))
+            payload = fake_questions(f"call {call_id}", total)
+
+        with self.slots:
+            time.sleep(
+                ROUND_TRIP
+                + mcq_service.estimate_tokens(prompt) * SECONDS_PER_TOKEN
+                + total * SECONDS_PER_QUESTION
+            )
+
+        message = SimpleNamespace(content=json.dumps(payload))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+# ==============================
+# Scenarios
+# ==============================
+def concurrent_users(client: StandInClient):
+    texts = [f"User {u} notes on topic {u}. " * 200 for u in range(CONCURRENT_USERS)]
+    threads = [
+        threading.Thread(target=mcq_service.request_mcq, args=(text, 3))
+        for text in texts
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def medium_document(client: StandInClient):
+    words = " ".join(f"term{i} concept{i % 97} detail{i % 13}" for i in range(6000))
+    mcq_service.generate_mcq(words, 10)
+
+
+def streamed_document(client: StandInClient):
+    pages = 60
+    records = (
+        {"text": " ".join(f"page{p} term{i}" for i in range(800)), "progress": (p + 1) / pages}
+        for p in range(pages)
+    )
+    mcq_service.generate_mcq_stream(records, 10)
+
+
+def run(name, scenario, batched: bool):
+    client = StandInClient()
+    mcq_service.client = client
+    mcq_service.BATCH_PROMPTS = batched
+
+    start = time.perf_counter()
+    scenario(client)
+    elapsed = time.perf_counter() - start
+
+    mode = "batched" if batched else "unbatched"
+    print(f"{name:<18} {mode:<10} calls={client.calls:<3} time={elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    for name, scenario in [("concurrent users", concurrent_users),
+                           ("medium document", medium_document),
+                           ("streamed document", streamed_document)]:
+        run(name, scenario, batched=False)
+        run(name, scenario, batched=True)
@@ -0,0 +1,58 @@
+"""
+Import time and peak RSS of app start-up, i.e. everything app.py imports
+at module load, for this tree and optionally for a baseline checkout.
+
+Run from src/mcq_generator:
+    git worktree add /tmp/mcq-baseline <baseline commit>
+    python -m benchmarks.startup /tmp/mcq-baseline/src/mcq_generator
+"""
+import ast
+import os
+import subprocess
+import sys
+
+PROBE = """
+import importlib, resource, sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"STARTUP {elapsed:.2f} {rss_mb:.0f}")
+"""
+
+
+def app_imports(app_dir: str):
+    with open(os.path.join(app_dir, "app.py")) as f:
+        tree = ast.parse(f.read())
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return modules
+
+
+def measure(app_dir: str):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, *app_imports(app_dir)],
+        capture_output=True, text=True, cwd=app_dir
+    )
+    if result.returncode:
+        return None, result.stderr.strip().splitlines()[-1]
+
+    line = [l for l in result.stdout.splitlines() if l.startswith("STARTUP")][-1]
+    _, elapsed, rss_mb = line.split()
+    return f"import={elapsed}s peak_rss={rss_mb}MB", None
+
+
+if __name__ == "__main__":
+    trees = [("current", os.getcwd())]
+    if len(sys.argv) > 1:
+        trees.insert(0, ("baseline", sys.argv[1]))
+
+    for name, app_dir in trees:
+        stats, error = measure(app_dir)
+        print(f"{name:<9} {stats or 'failed: ' + error}")
@@ -1,7 +1,25 @@
+import threading
+
 import whisper
 
-whisper_model = whisper.load_model("base")
+WHISPER_MODEL = "base"
+
+_whisper_model = None
+_whisper_lock = threading.Lock()
+
+
+def get_whisper_model():
+    # Loaded on first transcription and shared by all sessions; the lock
+    # keeps concurrent first calls from loading the model twice
+    global _whisper_model
+
+    with _whisper_lock:
+        if _whisper_model is None:
+            _whisper_model = whisper.load_model(WHISPER_MODEL)
+
+    return _whisper_model
+
 
 def audio_to_text(audio_path: str) -> str:
-    result = whisper_model.transcribe(audio_path)
-    return result["text"].strip()
\ No newline at end of file
+    result = get_whisper_model().transcribe(audio_path)
+    return result["text"].strip()
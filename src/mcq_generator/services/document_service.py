@@ -1,6 +1,6 @@
 import os
 import tempfile
-from typing import List
+from typing import Iterator, List, Sequence, Tuple
 
 import fitz 
 from docx import Document
@@ -12,84 +12,300 @@ from services.text_service import text_input_to_text
 import streamlit as st
 
 
+# ==============================
+# Config
+# ==============================
+OCR_DPI = 300                     # render resolution for OCR'd pages/regions
+MIN_TEXT_CHARS = 25               # below this a page has no usable text layer
+FULL_PAGE_IMAGE_RATIO = 0.8       # image covering this much of the page => scan
+MIN_IMAGE_AREA_RATIO = 0.05       # skip logos, icons and bullets
+REGION_TEXT_COVERAGE = 0.5        # image already overlaid by a text layer
+SCAN_TEXT_COVERAGE = 0.05         # full-page image under an OCR layer, not a stamp
+HEADER_FOOTER_BAND = 0.12         # top/bottom share of the page holding banners
+SCANNED_PAGE_CHARS = 2000         # assumed text of a page that needs OCR
+
+
 # ==============================
 # PDF Processing
 # ==============================
-def extract_from_pdf(file_path: str) -> str:
-    doc = fitz.open(file_path)
+def _ocr_pixmap(pixmap) -> str:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_img:
+        img_path = tmp_img.name
+
+    pixmap.save(img_path)
+    ocr_text = image_to_text(img_path)
+    os.remove(img_path)
+
+    return ocr_text
+
+
+def _ocr_embedded_image(doc, xref: int) -> str:
+    base_image = doc.extract_image(xref)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{base_image['ext']}") as tmp_img:
+        tmp_img.write(base_image["image"])
+        img_path = tmp_img.name
+
+    ocr_text = image_to_text(img_path)
+    os.remove(img_path)
+
+    return ocr_text
+
+
+def _text_coverage(region, text_blocks) -> float:
+    """
+    Fraction of `region` covered by text blocks of the page's text layer,
+    counting only the part of each block that lies inside the region.
+    """
+    region_area = region.get_area()
+    if not region_area:
+        return 0.0
+
+    covered = sum(
+        (fitz.Rect(block[:4]) & region).get_area()
+        for block in text_blocks
+    )
+    return min(1.0, covered / region_area)
+
+
+def _in_header_footer(rect, page_rect) -> bool:
+    band = page_rect.height * HEADER_FOOTER_BAND
+    return rect.y1 <= page_rect.y0 + band or rect.y0 >= page_rect.y1 - band
+
+
+def _page_segments(page, seen_images: set) -> List[str]:
+    """
+    Per-page extraction strategy:
+    - Scanned page (no text layer, one near full-page image): OCR the page
+    - Born-digital page: use the text layer, OCR only large image regions
+      that are not already covered by text
+    Images in the header/footer bands or already seen on an earlier page
+    (`seen_images`, shared across the document) are skipped.
+    Text blocks keep their native order; each OCR'd image is inserted
+    before the first block starting below it.
+    """
+    page_rect = page.rect
+    page_area = page_rect.get_area()
+
+    text_blocks = [
+        b for b in page.get_text("blocks")
+        if b[6] == 0 and b[4].strip()
+    ]
+    text_chars = sum(len(b[4].strip()) for b in text_blocks)
+
+    images = []
+    for info in page.get_image_info(hashes=True, xrefs=True):
+        rect = fitz.Rect(info["bbox"]) & page_rect
+        if rect.get_area() / page_area >= MIN_IMAGE_AREA_RATIO:
+            images.append((rect, info))
+
+    # ---- Scanned page ----
+    is_scanned = text_chars < MIN_TEXT_CHARS and any(
+        rect.get_area() / page_area >= FULL_PAGE_IMAGE_RATIO
+        for rect, _ in images
+    )
+    if is_scanned:
+        ocr_text = _ocr_pixmap(page.get_pixmap(dpi=OCR_DPI))
+        return [ocr_text] if ocr_text else []
+
+    # ---- Born-digital page ----
+    ocr_segments = []
+
+    for rect, info in images:
+        if _in_header_footer(rect, page_rect):
+            continue
+
+        key = info.get("digest") or info.get("xref")
+        if key in seen_images:
+            continue
+        seen_images.add(key)
+
+        # Near full-page image under an OCR text layer: already OCR'd scan
+        coverage = _text_coverage(rect, text_blocks)
+        if rect.get_area() / page_area >= FULL_PAGE_IMAGE_RATIO:
+            if coverage >= SCAN_TEXT_COVERAGE:
+                continue
+        elif coverage >= REGION_TEXT_COVERAGE:
+            continue
 
-    extracted_texts: List[str] = []
+        if info.get("xref"):
+            ocr_text = _ocr_embedded_image(page.parent, info["xref"])
+        else:
+            ocr_text = _ocr_pixmap(page.get_pixmap(dpi=OCR_DPI, clip=rect))
 
-    for page in doc:
-        # ---- Extract text ----
-        text = page.get_text().strip()
-        if text:
-            extracted_texts.append(text_input_to_text(text))
+        if ocr_text:
+            position = next(
+                (i for i, b in enumerate(text_blocks) if b[1] >= rect.y1),
+                len(text_blocks)
+            )
+            ocr_segments.append((position, rect.y0, ocr_text))
 
-        # ---- Extract images ----
-        for img_index, img in enumerate(page.get_images(full=True)):
-            xref = img[0]
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
+    # Key (block position, OCR first, y) keeps blocks in native order
+    segments = [
+        (i, 1, b[1], text_input_to_text(b[4].strip()))
+        for i, b in enumerate(text_blocks)
+    ]
+    segments += [(position, 0, y, text) for position, y, text in ocr_segments]
+    segments.sort(key=lambda s: s[:3])
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_img:
-                tmp_img.write(image_bytes)
-                img_path = tmp_img.name
+    return [text for *_, text in segments]
 
-            ocr_text = image_to_text(img_path)
-            if ocr_text:
-                extracted_texts.append(ocr_text)
 
-            os.remove(img_path)
+def iter_pdf_records(file_path: str) -> Iterator[dict]:
+    """
+    Stream a PDF one page at a time so only the current page is held
+    in memory. Each record carries its character offset in the joined text
+    and the fraction of the document read so far (from the page count).
+    """
+    doc = fitz.open(file_path)
+    offset = 0
+    seen_images = set()
+
+    try:
+        for page in doc:
+            text = "\n".join(_page_segments(page, seen_images))
+            if not text:
+                continue
 
-    return "\n".join(extracted_texts)
+            yield {
+                "source": "page", "index": page.number, "offset": offset,
+                "progress": (page.number + 1) / len(doc), "text": text,
+            }
+            offset += len(text) + 1
+    finally:
+        doc.close()
+
+
+def extract_from_pdf(file_path: str) -> str:
+    return "\n".join(record["text"] for record in iter_pdf_records(file_path))
 
 
 # ==============================
 # DOCX Processing
 # ==============================
-def extract_from_docx(file_path: str) -> str:
+def iter_docx_records(file_path: str) -> Iterator[dict]:
+    """
+    Stream paragraphs, then OCR'd images, of a DOCX file as records.
+    Progress is counted over paragraphs and image parts.
+    """
     document = Document(file_path)
+    offset = 0
 
-    extracted_texts: List[str] = []
+    image_rels = [
+        rel for rel in document.part._rels.values()
+        if "image" in rel.target_ref
+    ]
+    total = len(document.paragraphs) + len(image_rels)
 
     # ---- Extract text ----
-    for para in document.paragraphs:
-        if para.text.strip():
-            extracted_texts.append(text_input_to_text(para.text))
+    for index, para in enumerate(document.paragraphs):
+        if not para.text.strip():
+            continue
+
+        text = text_input_to_text(para.text)
+        yield {
+            "source": "paragraph", "index": index, "offset": offset,
+            "progress": (index + 1) / total, "text": text,
+        }
+        offset += len(text) + 1
 
     # ---- Extract images ----
-    for rel in document.part._rels.values():
-        if "image" in rel.target_ref:
-            image_part = rel.target_part
-            image_bytes = image_part.blob
+    for index, rel in enumerate(image_rels):
+        image_part = rel.target_part
+        image_bytes = image_part.blob
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_img:
-                tmp_img.write(image_bytes)
-                img_path = tmp_img.name
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_img:
+            tmp_img.write(image_bytes)
+            img_path = tmp_img.name
 
-            ocr_text = image_to_text(img_path)
-            if ocr_text:
-                extracted_texts.append(ocr_text)
+        ocr_text = image_to_text(img_path)
+        os.remove(img_path)
 
-            os.remove(img_path)
+        if ocr_text:
+            yield {
+                "source": "image", "index": index, "offset": offset,
+                "progress": (len(document.paragraphs) + index + 1) / total,
+                "text": ocr_text,
+            }
+            offset += len(ocr_text) + 1
 
-    return "\n".join(extracted_texts)
+
+def extract_from_docx(file_path: str) -> str:
+    return "\n".join(record["text"] for record in iter_docx_records(file_path))
 
 
 # ==============================
 # Main Entry
 # ==============================
-import os
+def iter_document_records(file_path: str, original_filename: str) -> Iterator[dict]:
+    name = original_filename.lower()
 
-def document_to_text(file_path: str, original_filename: str) -> str:
+    if ".pdf" in name:
+        return iter_pdf_records(file_path)
+
+    elif ".docx" in name or name.endswith(".doc"):
+        return iter_docx_records(file_path)
+
+    else:
+        raise ValueError(f"Unsupported document type: {original_filename}")
+
+
+def estimate_document_chars(file_path: str, original_filename: str) -> int:
+    """
+    Cheap size estimate used to weight documents against each other:
+    text-layer characters, without OCR. PDF pages with no text layer count
+    as SCANNED_PAGE_CHARS since they will be OCR'd.
+    """
     name = original_filename.lower()
 
     if ".pdf" in name:
-        return extract_from_pdf(file_path)
+        with fitz.open(file_path) as doc:
+            sizes = (len(page.get_text().strip()) for page in doc)
+            return sum(n if n >= MIN_TEXT_CHARS else SCANNED_PAGE_CHARS for n in sizes)
 
     elif ".docx" in name or name.endswith(".doc"):
-        return extract_from_docx(file_path)
+        document = Document(file_path)
+        return sum(len(para.text.strip()) for para in document.paragraphs)
 
     else:
-        raise ValueError(f"Unsupported document type: {original_filename}")
\ No newline at end of file
+        raise ValueError(f"Unsupported document type: {original_filename}")
+
+
+def iter_documents_records(files: Sequence[Tuple[str, str]]) -> Iterator[dict]:
+    """
+    Stream several (file_path, original_filename) documents as one input.
+    Offsets continue across documents and progress is rescaled by each
+    document's share of the total size, so questions are spread over all
+    documents in proportion to their length in characters.
+    """
+    if len(files) == 1:
+        yield from iter_document_records(*files[0])
+        return
+
+    sizes = [max(1, estimate_document_chars(path, name)) for path, name in files]
+    total = sum(sizes)
+
+    done = 0
+    offset = 0
+    for (path, name), size in zip(files, sizes):
+        end = offset
+        records = iter_document_records(path, name)
+        try:
+            for record in records:
+                yield {
+                    **record,
+                    "document": name,
+                    "offset": offset + record["offset"],
+                    "progress": (done + record["progress"] * size) / total,
+                }
+                end = offset + record["offset"] + len(record["text"]) + 1
+        finally:
+            records.close()
+
+        done += size
+        offset = end
+
+
+def document_to_text(file_path: str, original_filename: str) -> str:
+    records = iter_document_records(file_path, original_filename)
+    return "\n".join(record["text"] for record in records)
@@ -1,8 +1,15 @@
 import json
-import math
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
 
 from utils.json_utils import extract_json
 from models.mistral_client import client
+from services.quiz_planner import score_chunks, allocate_questions, plan_stream
 
 # ==============================
 # Config
@@ -10,6 +17,12 @@ from models.mistral_client import client
 MAX_TOKENS_PER_CALL = 4000         
 TOKEN_THRESHOLD = 6000              
 CHUNK_OVERLAP = 200                 # preserve context
+PREFETCH_CHUNKS = 2                 # chunks extracted ahead of the LLM
+BATCH_PROMPTS = True                # pack several sections into one call
+BATCH_MAX_TOKENS = 12000            # input budget of one batched call
+BATCH_WINDOW = 0.05                 # seconds to wait for concurrent requests
+BATCH_WORKERS = 4                   # batched calls in flight at once
+MAX_TOPUP_CALLS = 2                 # extra calls to replace duplicate questions
 
 # ==============================
 # RESPONSE SCHEMA
@@ -51,6 +64,20 @@ RESPONSE_JSON = {
     },
 }
 
+MCQ_RULES = """RULES:
+    - Questions must be based ONLY on the provided text
+    - No repetition of questions
+    - Each question must have 4 options (a, b, c, d)
+    - Each question can have one or more correct answers
+    - Provide a clear explanation for each correct answer
+    - The field "correct" MUST ALWAYS be a JSON ARRAY of option keys
+    - If only one option is correct, return a list with one element
+    - Otherwise, if multiple options are correct, return a list with all correct elements
+    - At least one question must have more than one correct answer
+    - Use ONLY keys from the "options" object
+    - Output ONLY valid JSON
+    - No markdown, no extra text"""
+
 # ==============================
 # Utility Functions
 # ==============================
@@ -77,6 +104,88 @@ def chunk_text(text: str, max_tokens: int, overlap: int):
     return chunks
 
 
+def close_iterator(iterator):
+    close = getattr(iterator, "close", None)
+    if close is not None:
+        close()
+
+
+def stream_chunks(records: Iterable[dict], max_tokens: int, overlap: int) -> Iterator[dict]:
+    """
+    Streaming counterpart of chunk_text.
+    Consumes page/paragraph records and yields a chunk as soon as it is
+    full, so memory is bounded by one chunk plus one record.
+    Each chunk carries the reading progress of its last record, if known.
+    """
+    max_chars = max_tokens * 4
+    overlap_chars = overlap * 4
+
+    buffer = ""
+    carried = 0                     # overlap already emitted with a chunk
+    progress = None
+
+    try:
+        for record in records:
+            buffer = f"{buffer}\n{record['text']}" if buffer else record["text"]
+            progress = record.get("progress")
+
+            while len(buffer) >= max_chars:
+                yield {"text": buffer[:max_chars], "progress": progress}
+                buffer = buffer[max_chars - overlap_chars:]
+                carried = overlap_chars
+
+        if len(buffer) > carried:
+            yield {"text": buffer, "progress": progress}
+    finally:
+        close_iterator(records)
+
+
+def prefetch(iterable: Iterable, size: int = PREFETCH_CHUNKS) -> Iterator:
+    """
+    Run `iterable` in a background thread, keeping at most `size` items
+    ready, so extraction overlaps with LLM calls. The iterable is closed
+    from the producer thread once it stops, even when stopped early.
+    """
+    items = queue.Queue(maxsize=size)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except Exception as exc:
+            put(exc)
+        else:
+            put(done)
+        finally:
+            close_iterator(iterable)
+
+    worker = threading.Thread(target=produce, daemon=True)
+    worker.start()
+
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
 def normalize_mcq_schema(mcqs: dict) -> dict:
     normalized = {}
 
@@ -114,20 +223,9 @@ def generate_mcq_from_text(text: str, num_questions: int):
 
     You are an expert MCQ Generator.
 
-    Create exactly {num_questions} multiple choice questions with atleast one question having more than one correct answer
+    Create exactly {num_questions} multiple choice questions
 
-    RULES:
-    - Questions must be based ONLY on the provided text
-    - No repetition of questions
-    - Each question must have 4 options (a, b, c, d)
-    - Each question can have one or more correct answers
-    - Provide a clear explanation for each correct answer
-    - The field "correct" MUST ALWAYS be a JSON ARRAY of option keys
-    - If only one option is correct, return a list with one element
-    - Otherwise, if multiple options are correct, return a list with all correct elements
-    - Use ONLY keys from the "options" object
-    - Output ONLY valid JSON
-    - No markdown, no extra text
+    {MCQ_RULES}
 
     FORMAT (follow this strictly):
     {json.dumps(RESPONSE_JSON, indent=2)}
@@ -145,6 +243,215 @@ def generate_mcq_from_text(text: str, num_questions: int):
     raw_json = extract_json(response.choices[0].message.content)
     return normalize_mcq_schema(raw_json)
 
+# ==============================
+# Batched Generation
+# ==============================
+def pack_sections(sections: Iterable[Tuple[str, int]], max_tokens: int) -> Iterator[List[Tuple[str, int]]]:
+    """
+    Group (text, question count) sections in order so that each group
+    fits into one call of at most max_tokens input tokens.
+    Lazy, so streamed sections are dispatched as soon as a group is full.
+    """
+    group = []
+    group_tokens = 0
+
+    for text, n in sections:
+        tokens = estimate_tokens(text)
+        if group and group_tokens + tokens > max_tokens:
+            yield group
+            group = []
+            group_tokens = 0
+        group.append((text, n))
+        group_tokens += tokens
+
+    if group:
+        yield group
+
+
+def valid_questions(mcqs) -> dict:
+    """
+    Keep only well-formed questions of one section of a batched response.
+    """
+    if not isinstance(mcqs, dict):
+        return {}
+
+    return {
+        q_id: q for q_id, q in mcqs.items()
+        if isinstance(q, dict)
+        and isinstance(q.get("mcq"), str)
+        and isinstance(q.get("options"), dict)
+        and q["options"]
+    }
+
+
+def generate_mcq_batch(sections: Sequence[Tuple[str, int]]) -> List[Union[dict, Exception]]:
+    """
+    Generate MCQs for several independent sections in one LLM call.
+    - Sections are tagged with their id and question count
+    - The response is split back per section and validated
+    - Missing or malformed questions of a section are retried alone
+    - A failed retry only affects its own section: partial questions are
+      kept, and a section with none gets its exception in place of a dict
+    """
+    if len(sections) == 1:
+        text, n = sections[0]
+        try:
+            return [generate_mcq_from_text(text, n)]
+        except Exception as exc:
+            return [exc]
+
+    tagged = "\n\n".join(
+        f'<section id="{i}" questions="{n}">\n{text}\n</section>'
+        for i, (text, n) in enumerate(sections, start=1)
+    )
+
+    prompt = f"""
+    Sections:
+    {tagged}
+
+    You are an expert MCQ Generator.
+
+    Each section above is independent. For EACH section, create exactly the
+    number of multiple choice questions given by its "questions" attribute,
+    based ONLY on that section's text. The RULES apply to each section.
+
+    {MCQ_RULES}
+    - Return ONE JSON object whose keys are the section ids ("1", "2", ...)
+
+    FORMAT of each section's value (follow this strictly):
+    {json.dumps(RESPONSE_JSON, indent=2)}
+    """
+
+    tokens_per_question = 200
+    max_tokens = max(512, sum(n for _, n in sections) * tokens_per_question)
+
+    try:
+        response = client.chat_completion(
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            max_tokens=max_tokens
+        )
+        raw_json = extract_json(response.choices[0].message.content)
+    except ValueError:
+        raw_json = {}
+
+    results = []
+    for i, (text, n) in enumerate(sections, start=1):
+        section_mcqs = raw_json.get(str(i)) if isinstance(raw_json, dict) else None
+        section_mcqs = normalize_mcq_schema(valid_questions(section_mcqs))
+
+        missing = n - len(section_mcqs)
+        if missing > 0:
+            try:
+                retry_mcqs = generate_mcq_from_text(text, missing)
+            except Exception as exc:
+                if not section_mcqs:
+                    results.append(exc)
+                    continue
+                retry_mcqs = {}
+
+            section_mcqs = merge_mcqs(
+                {str(k): q for k, q in enumerate(section_mcqs.values(), start=1)},
+                retry_mcqs,
+                n
+            )
+
+        results.append(section_mcqs)
+
+    return results
+
+
+class MCQBatcher:
+    """
+    Shares LLM round trips between concurrent callers (e.g. Streamlit
+    sessions). Requests arriving within BATCH_WINDOW of each other are
+    packed into one generate_mcq_batch call and each caller gets back
+    only its own section.
+    """
+
+    def __init__(self, window: float = BATCH_WINDOW, max_tokens: int = BATCH_MAX_TOKENS,
+                 workers: int = BATCH_WORKERS):
+        self.window = window
+        self.max_tokens = max_tokens
+        self.requests = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, text: str, num_questions: int) -> Future:
+        future = Future()
+        self.requests.put((text, num_questions, future))
+        return future
+
+    def _run(self):
+        pending = None
+
+        while True:
+            first = pending or self.requests.get()
+            pending = None
+
+            batch = [first]
+            batch_tokens = estimate_tokens(first[0])
+            deadline = time.monotonic() + self.window
+
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+                tokens = estimate_tokens(request[0])
+                if batch_tokens + tokens > self.max_tokens:
+                    pending = request
+                    break
+                batch.append(request)
+                batch_tokens += tokens
+
+            self.executor.submit(self._dispatch, batch)
+
+    @staticmethod
+    def _dispatch(batch):
+        try:
+            results = generate_mcq_batch([(text, n) for text, n, _ in batch])
+        except Exception as exc:
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+
+        for (_, _, future), mcqs in zip(batch, results):
+            if isinstance(mcqs, Exception):
+                future.set_exception(mcqs)
+            else:
+                future.set_result(mcqs)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> MCQBatcher:
+    global _batcher
+
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MCQBatcher()
+
+    return _batcher
+
+
+def request_mcq(text: str, num_questions: int) -> dict:
+    """
+    Single-section generation, shared with concurrent callers when
+    BATCH_PROMPTS is enabled.
+    """
+    if not BATCH_PROMPTS:
+        return generate_mcq_from_text(text, num_questions)
+
+    return get_batcher().submit(text, num_questions).result()
+
 # ==============================
 # Main Entry Point
 # ==============================
@@ -152,51 +459,178 @@ def generate_mcq(text: str, num_questions: int = 5):
     """
     Intelligent MCQ generator:
     - Direct generation for short text
-    - Chunked generation for long text
+    - Planned chunked generation for long text
     - Deduplicates questions
     - Enforces schema integrity
     """
+    return generate_mcq_multi([text], num_questions)
+
+
+def generate_mcq_multi(texts: Sequence[str], num_questions: int = 5):
+    """
+    MCQ generation over several documents or sections:
+    - Scores every chunk for information density (TF-IDF, no LLM)
+    - Allocates questions proportionally, spread over the whole input
+    - Makes one call per chunk that received questions
+    """
+    texts = [t for t in texts if t.strip()]
+    if not texts:
+        return {}
 
-    total_tokens = estimate_tokens(text)
+    total_tokens = sum(estimate_tokens(t) for t in texts)
 
     # --------------------------
     # Case 1: Small input
     # --------------------------
     if total_tokens <= TOKEN_THRESHOLD:
-        return generate_mcq_from_text(text, num_questions)
+        return request_mcq("\n".join(texts), num_questions)
 
     # --------------------------
     # Case 2: Large input
     # --------------------------
-    chunks = chunk_text(
-        text,
+    chunks = []
+    for text in texts:
+        if estimate_tokens(text) <= MAX_TOKENS_PER_CALL:
+            chunks.append(text)
+        else:
+            chunks.extend(chunk_text(
+                text,
+                max_tokens=MAX_TOKENS_PER_CALL,
+                overlap=CHUNK_OVERLAP
+            ))
+
+    scores = score_chunks(chunks)
+    allocation = allocate_questions(scores, num_questions)
+
+    planned = [(chunks[i], int(n)) for i, n in enumerate(allocation) if n]
+
+    if BATCH_PROMPTS:
+        final_mcqs = {}
+        errors = []
+        for group in pack_sections(planned, BATCH_MAX_TOKENS):
+            results = generate_mcq_batch(group)
+            errors += merge_batch_results(final_mcqs, results, num_questions)
+
+        if errors and not final_mcqs:
+            raise errors[0]
+    else:
+        final_mcqs = collect_mcqs(planned, num_questions)
+
+    # ---- Top up duplicates from the best unused chunks ----
+    unused = [i for i in np.argsort(-scores, kind="stable") if not allocation[i]]
+    for i in unused[:MAX_TOPUP_CALLS]:
+        missing = num_questions - len(final_mcqs)
+        if missing <= 0:
+            break
+        collect_mcqs([(chunks[i], missing)], num_questions, final_mcqs)
+
+    return final_mcqs
+
+
+def generate_mcq_stream(records: Iterable[dict], num_questions: int = 5):
+    """
+    Streaming MCQ generator for large documents:
+    - Buffers records only up to TOKEN_THRESHOLD to detect small inputs
+    - Otherwise chunks on the fly while extraction continues in the background
+    - Questions are planned per reading-progress window by information density
+    """
+    records = iter(records)
+
+    head = []
+    head_tokens = 0
+    for record in records:
+        head.append(record)
+        head_tokens += estimate_tokens(record["text"])
+        if head_tokens > TOKEN_THRESHOLD:
+            break
+    else:
+        text = "\n".join(record["text"] for record in head)
+        return request_mcq(text, num_questions) if text.strip() else {}
+
+    def all_records():
+        try:
+            yield from head
+            yield from records
+        finally:
+            close_iterator(records)
+
+    chunks = prefetch(stream_chunks(
+        all_records(),
         max_tokens=MAX_TOKENS_PER_CALL,
         overlap=CHUNK_OVERLAP
-    )
+    ))
 
-    questions_per_chunk = max(1, math.ceil(num_questions / len(chunks)))
+    sections = plan_stream(chunks, num_questions)
+    batch_tokens = BATCH_MAX_TOKENS if BATCH_PROMPTS else 0
 
     final_mcqs = {}
-    seen_questions = set()
-    q_counter = 1
+    errors = []
+    try:
+        for group in pack_sections(sections, batch_tokens):
+            results = generate_mcq_batch(group)
+            errors += merge_batch_results(final_mcqs, results, num_questions)
+
+            if len(final_mcqs) >= num_questions:
+                break
+    finally:
+        chunks.close()
+
+    if errors and not final_mcqs:
+        raise errors[0]
+
+    return final_mcqs
+
 
-    for chunk in chunks:
+def merge_mcqs(final_mcqs: dict, chunk_mcqs: dict, num_questions: int) -> dict:
+    """
+    Add chunk_mcqs to final_mcqs, skipping duplicate questions,
+    until num_questions have been collected.
+    """
+    seen_questions = {q["mcq"].strip().lower() for q in final_mcqs.values()}
+    q_counter = len(final_mcqs) + 1
+
+    for _, q in chunk_mcqs.items():
         if q_counter > num_questions:
             break
 
-        chunk_mcqs = generate_mcq_from_text(chunk, questions_per_chunk)
+        question_text = q["mcq"].strip().lower()
 
-        for _, q in chunk_mcqs.items():
-            question_text = q["mcq"].strip().lower()
+        if question_text in seen_questions:
+            continue
 
-            if question_text in seen_questions:
-                continue
+        final_mcqs[str(q_counter)] = q
+        seen_questions.add(question_text)
+        q_counter += 1
 
-            final_mcqs[str(q_counter)] = q
-            seen_questions.add(question_text)
-            q_counter += 1
+    return final_mcqs
 
-            if q_counter > num_questions:
-                break
 
-    return final_mcqs
\ No newline at end of file
+def merge_batch_results(final_mcqs: dict, results: Iterable, num_questions: int) -> List[Exception]:
+    """
+    Merge generate_mcq_batch results into final_mcqs; failed sections
+    are skipped and their exceptions returned.
+    """
+    errors = []
+    for result in results:
+        if isinstance(result, Exception):
+            errors.append(result)
+        else:
+            merge_mcqs(final_mcqs, result, num_questions)
+    return errors
+
+
+def collect_mcqs(calls: Iterable[Tuple[str, int]], num_questions: int, final_mcqs: dict = None):
+    """
+    Run (chunk, question count) calls in turn, deduplicating questions,
+    until num_questions have been collected.
+    """
+    final_mcqs = {} if final_mcqs is None else final_mcqs
+
+    for chunk, chunk_questions in calls:
+        if len(final_mcqs) >= num_questions:
+            break
+
+        chunk_mcqs = generate_mcq_from_text(chunk, chunk_questions)
+        merge_mcqs(final_mcqs, chunk_mcqs, num_questions)
+
+    return final_mcqs
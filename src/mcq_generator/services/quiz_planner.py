@@ -0,0 +1,164 @@
+import math
+import re
+from collections import Counter
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+# ==============================
+# Config
+# ==============================
+MIN_WORD_LENGTH = 3
+MAX_WINDOW_CHUNKS = 8             # streamed chunks held per planning window
+
+STOPWORDS = {
+    "the", "and", "for", "are", "but", "not", "you", "all", "any", "can",
+    "had", "her", "was", "one", "our", "out", "has", "his", "how", "its",
+    "may", "new", "now", "see", "two", "who", "did", "get", "let", "say",
+    "she", "too", "use", "that", "with", "have", "this", "will", "your",
+    "from", "they", "been", "were", "what", "when", "which", "their",
+    "there", "then", "them", "these", "those", "than", "into", "also",
+    "such", "only", "other", "some", "more", "most", "each", "about",
+    "would", "could", "should", "being", "over", "very", "where", "while",
+}
+
+# ==============================
+# Scoring
+# ==============================
+def tokenize(text: str) -> List[str]:
+    words = re.findall(r"[a-z][a-z0-9]+", text.lower())
+    return [w for w in words if len(w) >= MIN_WORD_LENGTH and w not in STOPWORDS]
+
+
+def score_chunks(chunks: Sequence[str]) -> np.ndarray:
+    """
+    Cheap information-density score per chunk, no LLM involved.
+    Sum of sublinear TF-IDF weights, i.e. how many distinctive keywords
+    a chunk covers and how rare they are across the whole input.
+    """
+    counts = [Counter(tokenize(chunk)) for chunk in chunks]
+
+    vocab = {}
+    for counter in counts:
+        for word in counter:
+            vocab.setdefault(word, len(vocab))
+
+    if not vocab:
+        return np.ones(len(chunks))
+
+    tf = np.zeros((len(chunks), len(vocab)), dtype=np.float32)
+    for row, counter in enumerate(counts):
+        cols = [vocab[w] for w in counter]
+        tf[row, cols] = list(counter.values())
+
+    doc_freq = np.count_nonzero(tf, axis=0)
+    idf = np.log((1 + len(chunks)) / (1 + doc_freq)) + 1
+
+    weights = np.log1p(tf) * idf
+    return weights.sum(axis=1)
+
+
+# ==============================
+# Allocation
+# ==============================
+def allocate_questions(scores: np.ndarray, num_questions: int) -> np.ndarray:
+    """
+    Allocate questions to chunks proportionally to their score.
+
+    Systematic sampling over the cumulative score: question k goes to the
+    chunk where the cumulative share crosses (k + 0.5) / num_questions.
+    Every chunk gets its proportional share (+/- 1), and when there are
+    fewer questions than chunks the picks stay spread over the whole input
+    instead of clustering at the start.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if num_questions <= 0 or not len(scores):
+        return np.zeros(len(scores), dtype=int)
+
+    if scores.sum() <= 0:
+        scores = np.ones(len(scores))
+
+    cumulative = np.cumsum(scores) / scores.sum()
+    targets = (np.arange(num_questions) + 0.5) / num_questions
+
+    picks = np.searchsorted(cumulative, targets)
+    picks = np.minimum(picks, len(scores) - 1)
+
+    return np.bincount(picks, minlength=len(scores))
+
+
+def allocate_by_density(scores: np.ndarray, num_questions: int) -> np.ndarray:
+    """
+    Largest-remainder allocation: proportional to score, with leftover
+    questions going to the densest chunks. Unlike allocate_questions it
+    does not spread picks by position, so it is used inside a window
+    where position is already accounted for.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if num_questions <= 0 or not len(scores):
+        return np.zeros(len(scores), dtype=int)
+
+    if scores.sum() <= 0:
+        scores = np.ones(len(scores))
+
+    quotas = scores / scores.sum() * num_questions
+    counts = np.floor(quotas).astype(int)
+
+    remaining = num_questions - counts.sum()
+    order = np.argsort(-(quotas - counts), kind="stable")
+    counts[order[:remaining]] += 1
+
+    return counts
+
+
+def plan_stream(chunks: Iterable[dict], num_questions: int) -> Iterator[Tuple[str, int]]:
+    """
+    Streaming counterpart of allocate_questions, for documents too large
+    to hold in memory.
+
+    Reading progress splits the document into num_questions equal windows.
+    When a window closes, its questions go to its densest chunks using
+    score_chunks / allocate_by_density, and the window is dropped. A window
+    is capped at MAX_WINDOW_CHUNKS by evicting its least dense chunk.
+    Chunks without progress form one window each.
+    Yields (chunk text, question count) in document order.
+    """
+    assigned = 0
+    window: List[str] = []
+    last_text = None
+
+    for chunk in chunks:
+        window.append(chunk["text"])
+        last_text = chunk["text"]
+
+        if len(window) > MAX_WINDOW_CHUNKS:
+            del window[int(np.argmin(score_chunks(window)))]
+
+        progress = chunk.get("progress")
+        if progress is None:
+            due = assigned + 1
+        else:
+            due = math.floor(progress * num_questions + 1e-9)
+        due = min(num_questions, due)
+
+        if due > assigned:
+            yield from _plan_window(window, due - assigned)
+            assigned = due
+            window = []
+
+        if assigned >= num_questions:
+            return
+
+    # ---- Questions left after the last window boundary ----
+    if assigned < num_questions:
+        if window:
+            yield from _plan_window(window, num_questions - assigned)
+        elif last_text is not None:
+            yield last_text, num_questions - assigned
+
+
+def _plan_window(window: Sequence[str], num_questions: int) -> Iterator[Tuple[str, int]]:
+    allocation = allocate_by_density(score_chunks(window), num_questions)
+    for text, n in zip(window, allocation):
+        if n:
+            yield text, int(n)
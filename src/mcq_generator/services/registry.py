@@ -0,0 +1,31 @@
+import importlib
+from functools import lru_cache
+
+# ==============================
+# Ingestion Backends
+# ==============================
+# Input type -> (module, entry point). Modules are imported only when their
+# input type is first selected, so a session that only uses text never pays
+# for whisper, cv2, fitz or ffmpeg.
+SERVICES = {
+    "Text": ("services.text_service", "text_input_to_text"),
+    "Image": ("services.image_service", "image_to_text"),
+    "Audio": ("services.audio_service", "audio_to_text"),
+    "Video": ("services.video_service", "video_to_text"),
+    "Document": ("services.document_service", "iter_documents_records"),
+    "URL": ("services.url_service", "scrape_url_to_text"),
+}
+
+
+@lru_cache(maxsize=None)
+def get_service(input_type: str):
+    """
+    Import the backend for `input_type` on first use and return its entry
+    point. Cached per process, so it is shared by all Streamlit sessions.
+    """
+    if input_type not in SERVICES:
+        raise ValueError(f"Unsupported input type: {input_type}")
+
+    module_name, attr = SERVICES[input_type]
+    module = importlib.import_module(module_name)
+    return getattr(module, attr)
@@ -1,8 +1,7 @@
-from moviepy.video.io.VideoFileClip import VideoFileClip
-from services.audio_service import audio_to_text
-import subprocess 
 import ffmpeg
 
+from services.audio_service import audio_to_text
+
 def video_to_text(video_path):
     audio_path = extract_audio(video_path)
     return audio_to_text(audio_path)